@@ -0,0 +1,235 @@
+import io
+import unittest
+from collections import Counter
+from contextlib import redirect_stdout
+from typing import List, Optional
+from unittest import mock
+
+from wordle import Filter, Solver, WordleCli
+from words import WORDS
+
+# A small fixed word list with plenty of anagrams, so that many words tie.
+WORD_LIST = [
+    "arose", "stare", "tares", "rates", "aster", "taser", "crane", "nacre",
+    "crate", "trace", "react", "cater", "there", "three", "ether", "spilt",
+    "split", "spite", "stile", "islet", "tiles", "unite", "untie", "elect",
+    "crone", "tenor", "toner", "eerie", "lurid", "sheep",
+]
+
+# Answers and guesses for the regression games; the guesses have no repeated
+# letters, where the original solver and this one filter the same way.
+GAMES = [
+    ("there", ["arose", "spilt", "crate"]),
+    ("crane", ["stare", "tenor"]),
+    ("split", ["arose", "unite", "tiles"]),
+    ("toner", ["crate", "islet", "crone"]),
+    ("cater", ["arose", "crate", "react"]),
+    ("lurid", ["sheep", "tenor"]),
+    # Words that tie on the last turn but not before it.
+    ("stare", ["untie", "tenor"]),
+    ("stare", ["toner", "untie"]),
+]
+
+
+def _evaluate(guess: str, answer: str) -> List[Optional[bool]]:
+    values: List[Optional[bool]] = [False] * len(guess)
+    unmatched = [a for g, a in zip(guess, answer) if g != a]
+    for ix, (g, a) in enumerate(zip(guess, answer)):
+        if g == a:
+            values[ix] = True
+        elif g in unmatched:
+            values[ix] = None
+            unmatched.remove(g)
+    return values
+
+
+def _reference_top(guesses: List[str], answer: str) -> List[str]:
+    """
+    Ranks WORD_LIST the way the solver originally did: after every guess the
+    consistent words are stably re-sorted by the summed counts of their
+    distinct letters, with letters not yet guessed weighted up.
+    """
+    words = list(WORD_LIST)
+    guessed = set()
+
+    def rank(words: List[str]) -> List[str]:
+        multiplier = 5 * len(words)
+        values = Counter(''.join(words))
+        for letter in set(''.join(WORD_LIST)) - guessed:
+            values[letter] *= multiplier
+        return sorted(words, key=lambda w: -sum(values[l] for l in set(w)))
+
+    words = rank(words)
+    for guess in guesses:
+        values = _evaluate(guess, answer)
+        words = [w for w in words if _evaluate(guess, w) == values]
+        guessed.update(guess)
+        words = rank(words)
+    return words
+
+
+def _small_solver() -> Solver:
+    with mock.patch('wordle.WORDS', WORD_LIST):
+        return Solver()
+
+
+class SolverTest(unittest.TestCase):
+
+    def _solver(self, guesses: List[str], answer: str) -> Solver:
+        solver = Solver()
+        for guess in guesses:
+            solver.update(guess, _evaluate(guess, answer))
+        return solver
+
+    def test_matches_original_ranking(self):
+        for answer, guesses in GAMES:
+            solver = _small_solver()
+            self.assertEqual(solver.top(), _reference_top([], answer))
+            for turn in range(1, len(guesses) + 1):
+                guess = guesses[turn - 1]
+                solver.update(guess, _evaluate(guess, answer))
+                self.assertEqual(solver.top(),
+                                 _reference_top(guesses[:turn], answer),
+                                 (answer, guesses[:turn]))
+
+    def test_top_count_is_prefix_of_ranking(self):
+        solver = _small_solver()
+        solver.update("arose", _evaluate("arose", "there"))
+        ranking = solver.top()
+        for count in range(1, len(ranking) + 2):
+            self.assertEqual(solver.top(count), ranking[:count])
+
+    def test_filter_matches_evaluations(self):
+        words = [w for w in WORDS if len(w) == 5]
+        for answer, guesses in GAMES:
+            solver = Solver()
+            for guess in guesses:
+                solver.update(guess, _evaluate(guess, answer))
+            expected = {w for w in words
+                        if all(_evaluate(g, w) == _evaluate(g, answer)
+                               for g in guesses)}
+            self.assertEqual(set(solver.top()), expected, answer)
+
+    def test_repeated_evaluation_keeps_scores(self):
+        solver = _small_solver()
+        values = _evaluate("arose", "there")
+        solver.update("arose", values)
+        scores = solver._scores
+        ranking = solver.top()
+        solver.update("arose", values)
+        self.assertIs(solver._scores, scores)
+        self.assertEqual(solver.top(), ranking)
+
+    def test_undo_matches_fresh_solver(self):
+        solver = self._solver(["arose", "spilt"], "there")
+        self.assertTrue(solver.undo())
+        self.assertEqual(solver.top(), self._solver(["arose"], "there").top())
+        self.assertTrue(solver.undo())
+        self.assertEqual(solver.top(), Solver().top())
+        self.assertFalse(solver.undo())
+
+    def test_replay_matches_fresh_solver(self):
+        solver = self._solver(["arose", "spilt"], "there")
+        solver.undo()
+        solver.undo()
+        for guess in ["arose", "spilt", "crate"]:
+            solver.update(guess, _evaluate(guess, "there"))
+        fresh = self._solver(["arose", "spilt", "crate"], "there")
+        self.assertEqual(solver.top(), fresh.top())
+
+    def test_gray_duplicate_keeps_answer(self):
+        values = _evaluate("elect", "crane")
+        self.assertEqual(values, [None, False, False, None, False])
+        solver = Solver()
+        solver.update("elect", values)
+        self.assertIn("crane", solver.top())
+        self.assertNotIn("elect", solver.top())
+
+    def test_green_and_gray_duplicates_keep_answer(self):
+        values = _evaluate("eerie", "crane")
+        self.assertEqual(values, [False, False, None, False, True])
+        solver = Solver()
+        solver.update("eerie", values)
+        self.assertIn("crane", solver.top())
+        self.assertTrue(all(w[4] == "e" and "e" not in w[:2]
+                            for w in solver.top()))
+
+
+class FilterTest(unittest.TestCase):
+
+    def test_accept_rejects_non_lowercase(self):
+        word_filter = Filter()
+        self.assertTrue(word_filter.accept("hello"))
+        self.assertFalse(word_filter.accept("HELLO"))
+        self.assertFalse(word_filter.accept("ab-cd"))
+
+    def test_accept_applies_constraints(self):
+        word_filter = Filter()
+        word_filter.update("arose", _evaluate("arose", "there"))
+        self.assertTrue(word_filter.accept("there"))
+        self.assertTrue(word_filter.accept("three"))
+        self.assertFalse(word_filter.accept("stare"))
+        self.assertFalse(word_filter.accept("those"))
+        self.assertTrue(word_filter.accept("rhyme"))
+        self.assertFalse(word_filter.accept("the"))
+
+
+class WordleCliTest(unittest.TestCase):
+
+    def setUp(self):
+        with mock.patch('wordle.WORDS', WORD_LIST):
+            self.cli = WordleCli()
+
+    def _handle(self, line: Optional[str]) -> str:
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.assertTrue(self.cli._handle_line(line))
+        return out.getvalue()
+
+    def test_exit_commands(self):
+        for line in ("exit", "quit", "done", "bye", " Exit "):
+            self.assertFalse(self.cli._handle_line(line))
+        self.assertFalse(self.cli._handle_line(None))
+
+    def test_blank_line_reprompts_quietly(self):
+        self.assertEqual(self._handle(""), "")
+        self.assertEqual(self._handle("   "), "")
+
+    def test_top_size(self):
+        self._handle("3")
+        self.assertEqual(self.cli._top_size, 3)
+        self.assertIn("at least one", self._handle("0"))
+        self.assertEqual(self.cli._top_size, 1)
+
+    def test_evaluation(self):
+        self.assertEqual(self._handle("arose x-xxo"), "")
+        self.assertEqual(self._handle("spilt xxxx-"), "")
+        self.assertEqual(self.cli._solver.top(),
+                         _reference_top(["arose", "spilt"], "there"))
+
+    def test_malformed_evaluation_shows_help(self):
+        top = self.cli._solver.top()
+        for line in ("arose x-xx", "arose x-xxq", "aros x-xxo", "arose",
+                     "arose x-xxo extra"):
+            self.assertIn("You will be prompted", self._handle(line), line)
+        self.assertEqual(self.cli._solver.top(), top)
+
+    def test_undo(self):
+        top = self.cli._solver.top()
+        self._handle("arose x-xxo")
+        self.assertEqual(self._handle("undo"), "")
+        self.assertEqual(self.cli._solver.top(), top)
+        self.assertIn("no evaluation to undo", self._handle("undo"))
+
+    def test_main_stops_at_end_of_input(self):
+        out = io.StringIO()
+        with mock.patch('builtins.input',
+                        side_effect=["2", "arose x-xxo", EOFError]), \
+                redirect_stdout(out):
+            self.cli.main()
+        self.assertIn(str(_reference_top(["arose"], "there")[:2]),
+                      out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
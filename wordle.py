@@ -1,91 +1,81 @@
 import re
 import string
-from sys import stdin
-from typing import Dict, Set, List, Tuple
+from collections import Counter, OrderedDict
+from functools import reduce
+from heapq import nlargest
+from operator import or_
+from typing import Dict, Set, List, Optional, Tuple, Union
 
 from words import WORDS
 
-_LOWERS = {c: True for c in string.ascii_lowercase}
+_ALL_LETTERS = (1 << 26) - 1
+_MAX_STATES = 64
+_LETTER_CODES = bytes.maketrans(
+    string.ascii_lowercase.encode('ascii'), bytes(range(26)))
 
 
-def _is_lower(word: str):
-    for c in word:
-        if not _LOWERS.get(c):
-            return False
-    return True
+def _set_bits(mask: int) -> List[int]:
+    return [ix for ix, bit in enumerate(reversed(bin(mask)[2:])) if bit == '1']
 
 
-class LetterFilter:
+def _bit_count(mask: int) -> int:
+    return bin(mask).count('1')
 
-    def __init__(self, letter: str, word_length: int):
-        if letter is None or len(letter) != 1:
-            raise ValueError(f'letter ("{letter}") is not a single character')
-        if word_length <= 0:
-            raise ValueError(
-                f"word_length ({word_length}) is not greater than zero")
-        self._letter = letter
-        self._positions = [None] * word_length
-        self._required = False
 
-    @property
-    def disqualified(self) -> bool:
-        for value in self._positions:
-            if value != False:
-                return False
-        return True
-
-    @property
-    def letter(self) -> str:
-        return self._letter
-
-    def accept(self, word: str) -> bool:
-        if word is None or len(word) != len(self._positions):
-            return False
-        has_letter = False
-        for ix, value in enumerate(self._positions):
-            has_letter = has_letter or word[ix] == self.letter
-            if value is not None:
-                letter_required = True
-                if (value and word[ix] != self.letter) or (not value and word[ix] == self.letter):
-                    return False
-        return not self._required or has_letter
-
-    def set_at_index(self, index: int, value: bool, required: bool) -> None:
-        if index < 0 or index >= len(self._positions):
-            raise IndexError(
-                f"index ({index}) must out of range [0, {len(self._positions) - 1}]")
-        self._positions[index] = value
-        self._required = required
-
-    def disqualify(self) -> None:
-        for ix in range(0, len(self._positions)):
-            self._positions[ix] = False
-        self._required = False
-
-    @property
-    def unknown(self) -> bool:
-        return all(v is None for v in self._positions)
+def _is_lower(word: str):
+    return word.isascii() and word.isalpha() and word.islower()
 
 
 class Filter:
     def __init__(self, word_length: int = 5):
         self._word_length = word_length
-        self._letter_filters = {l: LetterFilter(
-            l, word_length) for l in string.ascii_lowercase}
+        self._required_mask = 0
+        self._forbidden_mask = 0
+        self._allowed = [_ALL_LETTERS] * word_length
 
     @property
     def length(self):
         return self._word_length
 
+    def copy(self) -> 'Filter':
+        other = Filter(self._word_length)
+        other._required_mask = self._required_mask
+        other._forbidden_mask = self._forbidden_mask
+        other._allowed = list(self._allowed)
+        return other
+
+    @property
+    def required_mask(self) -> int:
+        return self._required_mask
+
+    @property
+    def forbidden_mask(self) -> int:
+        return self._forbidden_mask
+
+    @property
+    def allowed_masks(self) -> Tuple[int, ...]:
+        return tuple(self._allowed)
+
     def accept(self, word: str):
-        for letter_filter in self._letter_filters.values():
-            if not letter_filter.accept(word):
-                return False
-        return True
+        if word is None or len(word) != self._word_length:
+            return False
+        if not _is_lower(word):
+            return False
+        required = self._required_mask
+        chars = [1 << (ord(c) - 97) for c in word]
+        presence = reduce(or_, chars, 0)
+        if (presence & required) != required or presence & self._forbidden_mask:
+            return False
+        return all(bit & allowed for bit, allowed in zip(chars, self._allowed))
+
+    @property
+    def unknown_mask(self) -> int:
+        return _ALL_LETTERS & ~(self._required_mask | self._forbidden_mask)
 
     @property
     def unknown_letters(self) -> Set[str]:
-        return set(l for l, f in self._letter_filters.items() if f.unknown)
+        return set(string.ascii_lowercase[ix]
+                   for ix in _set_bits(self.unknown_mask))
 
     def update(self, word: str, values: List[bool]):
         """
@@ -103,13 +93,36 @@ class Filter:
         if not _is_lower(word):
             raise ValueError(
                 f'word ("{word}") contains non-alphabetic characters')
+        # Greens and yellows are applied first so that a gray duplicate of a
+        # letter that is in the word only rules out its own position.
+        grays = []
         for ix, letter in enumerate(word):
+            bit = 1 << (ord(letter) - 97)
             if values[ix] is None:
-                self._letter_filters[letter].set_at_index(ix, False, True)
+                self._allowed[ix] &= ~bit
+                self._required_mask |= bit
             elif values[ix]:
-                self._letter_filters[letter].set_at_index(ix, True, True)
+                self._allowed[ix] = bit
+                self._required_mask |= bit
+            else:
+                grays.append((ix, bit))
+        for ix, bit in grays:
+            if self._required_mask & bit:
+                self._allowed[ix] &= ~bit
             else:
-                self._letter_filters[letter].disqualify()
+                self._forbidden_mask |= bit
+
+
+# A guess and its evaluation, and the sequence of them applied to a solver.
+_Evaluation = Tuple[str, Tuple[Optional[bool], ...]]
+_History = Tuple[_Evaluation, ...]
+# A word's score on the latest turn paired with its score from the turn
+# before, nested back to the word's negated list index. Comparing these keeps
+# the previous turn's order for ties; there is one level per rescored guess.
+_Score = Union[int, Tuple[int, '_Score']]
+# Filter, surviving-word bit set, candidates, letter frequencies, scores and
+# unknown-letter mask of a solver.
+_SolverState = Tuple[Filter, int, List[int], List[int], Dict[int, _Score], int]
 
 
 class Solver:
@@ -117,28 +130,133 @@ class Solver:
         self._word_length = word_length
         self._filter = Filter(word_length)
         self._word_list = [w for w in WORDS if len(w) == word_length]
-        self._sort_word_list()
-        self._frequency = {c: 0 for c in string.ascii_lowercase}
-
-    def _sort_word_list(self):
-        multiplier = self.word_length * len(self._word_list)
-        letter_values = {c: 0 for c in string.ascii_lowercase}
-        for word in self._word_list:
-            for letter in word:
-                letter_values[letter] += 1
-        for letter in self._filter.unknown_letters:
-            letter_values[letter] *= multiplier
-        self._word_list.sort(
-            key=lambda w: -sum(letter_values[l] for l in set(w)))
+        # Letter codes run from 0 for 'a' through 25 for 'z'; the strings in
+        # _word_list are only needed for display.
+        word_codes = [w.encode('ascii').translate(_LETTER_CODES)
+                      for w in self._word_list]
+        # Each word's distinct letters, i.e. the non-zero columns of its row in
+        # a word-by-letter indicator matrix, read off its letter presence mask.
+        # Words with the same letters (e.g. anagrams) share one bytes object.
+        presence = [reduce(or_, (1 << c for c in codes)) for codes in word_codes]
+        buckets = {mask: bytes(_set_bits(mask)) for mask in set(presence)}
+        self._word_letters = [buckets[mask] for mask in presence]
+        # Bit ix of _letter_words[c] is set when word ix contains letter c, and
+        # bit ix of _position_words[j][c] when it has letter c at position j,
+        # so a constraint is applied to every word at once with one int op.
+        self._letter_words = [0] * 26
+        self._position_words = [[0] * 26 for _ in range(word_length)]
+        for ix, codes in enumerate(word_codes):
+            bit = 1 << ix
+            for position_words, code in zip(self._position_words, codes):
+                position_words[code] |= bit
+        for position_words in self._position_words:
+            for code, words in enumerate(position_words):
+                self._letter_words[code] |= words
+        self._alive = (1 << len(self._word_list)) - 1
+        self._candidates = list(range(len(self._word_list)))
+        self._frequency = [0] * 26
+        for code, count in Counter(b''.join(word_codes)).items():
+            self._frequency[code] = count
+        # Ties are broken in favour of earlier words in the list.
+        self._scores: Dict[int, _Score] = {ix: -ix for ix in self._candidates}
+        self._score_word_list()
+        # Solver state after the most recently used sequences of evaluations,
+        # so that replaying or undoing a guess does not filter the list again.
+        self._history: _History = ()
+        self._states: 'OrderedDict[_History, _SolverState]' = OrderedDict()
+        self._save_state()
+
+    def _save_state(self) -> None:
+        self._states[self._history] = (
+            self._filter, self._alive, self._candidates, self._frequency,
+            self._scores, self._last_unknown)
+        # Drop the least recently used states, but never the current history
+        # or its prefixes, so undo always finds the state it goes back to.
+        prefixes = {self._history[:ix] for ix in range(len(self._history) + 1)}
+        for history in list(self._states):
+            if len(self._states) <= _MAX_STATES:
+                break
+            if history not in prefixes:
+                del self._states[history]
+
+    def _restore(self, history: _History) -> None:
+        (self._filter, self._alive, self._candidates, self._frequency,
+         self._scores, self._last_unknown) = self._states[history]
+        self._states.move_to_end(history)
+        self._history = history
+
+    def _score_word_list(self):
+        letters = self._word_letters
+        multiplier = self.word_length * len(self._candidates)
+        values = list(self._frequency)
+        self._last_unknown = self._filter.unknown_mask
+        for code in _set_bits(self._last_unknown):
+            values[code] *= multiplier
+        value = values.__getitem__
+        # See _Score for why each score is paired with the previous one.
+        previous = self._scores
+        self._scores = {ix: (sum(map(value, letters[ix])), previous[ix])
+                        for ix in self._candidates}
 
     def top(self, count: int = None) -> List[str]:
-        return self._word_list[0:] if count is None else self._word_list[:count]
+        if count is None:
+            candidates = sorted(self._candidates,
+                                key=self._scores.__getitem__, reverse=True)
+        else:
+            candidates = nlargest(count, self._candidates,
+                                  key=self._scores.__getitem__)
+        return [self._word_list[ix] for ix in candidates]
 
     def update(self, word: str, values: List[bool]):
-        self._filter.update(word, values)
-        self._word_list = [
-            w for w in self._word_list if self._filter.accept(w)]
-        self._sort_word_list()
+        history = self._history + ((word.lower(), tuple(values)),)
+        if history in self._states:
+            self._restore(history)
+            return
+        # Filters are updated in place, so work on a copy to keep the saved
+        # states intact.
+        word_filter = self._filter.copy()
+        word_filter.update(word, values)
+        self._filter = word_filter
+        alive = self._alive
+        for code in _set_bits(word_filter.required_mask):
+            alive &= self._letter_words[code]
+        for code in _set_bits(word_filter.forbidden_mask):
+            alive &= ~self._letter_words[code]
+        for position_words, allowed in zip(self._position_words,
+                                           word_filter.allowed_masks):
+            if allowed == _ALL_LETTERS:
+                continue
+            # Whichever of the allowed or excluded letters is the shorter list
+            # decides the words kept at this position.
+            excluded = _ALL_LETTERS & ~allowed
+            if _bit_count(excluded) < _bit_count(allowed):
+                alive &= ~reduce(or_, (position_words[code]
+                                       for code in _set_bits(excluded)))
+            else:
+                alive &= reduce(or_, (position_words[code]
+                                      for code in _set_bits(allowed)), 0)
+        # Scores only depend on the letter counts and on which letters are
+        # unknown, so if neither changed the current scores still hold.
+        if (alive != self._alive
+                or word_filter.unknown_mask != self._last_unknown):
+            self._alive = alive
+            self._candidates = _set_bits(alive)
+            # Counting each letter's survivors with popcounts over the bit sets
+            # is cheaper than subtracting the letters of every rejected word,
+            # so the counts are rebuilt rather than updated.
+            self._frequency = [
+                sum(_bit_count(alive & position_words[code])
+                    for position_words in self._position_words)
+                for code in range(26)]
+            self._score_word_list()
+        self._history = history
+        self._save_state()
+
+    def undo(self) -> bool:
+        if not self._history:
+            return False
+        self._restore(self._history[:-1])
+        return True
 
     @property
     def word_length(self):
@@ -149,16 +267,22 @@ class WordleCli:
     def __init__(self, word_length: int = 5):
         self._solver = Solver(word_length)
         self._top_size = 10
+        self._eval_re = re.compile(f'[-ox]{{{word_length}}}')
+        self._digit_re = re.compile(r'\d+')
 
-    def _handle_line(self, line: str) -> bool:
-        if line == '':
+    def _handle_line(self, line: Optional[str]) -> bool:
+        if line is None:
             return False
-        line = line.lower()
-        line = line[:-1] if len(line) > 0 and line[-1] == "\n" else line
+        line = line.strip().lower()
         if line in ("exit", "quit", "done", "bye"):
             return False
+        if not line:
+            return True
         tokens = line.split()
-        if re.fullmatch(r'\d+', line):
+        if line == "undo":
+            if not self._solver.undo():
+                print("There is no evaluation to undo...")
+        elif self._digit_re.fullmatch(line):
             self._top_size = int(line)
             if self._top_size < 1:
                 print("Top value count must be at least one (setting to one)...")
@@ -167,8 +291,7 @@ class WordleCli:
             len(tokens) == 2
             and len(tokens[0]) == self._solver.word_length
             and _is_lower(tokens[0])
-            and len(tokens[1]) == self._solver.word_length
-            and re.fullmatch('[-ox]+', tokens[1])
+            and self._eval_re.fullmatch(tokens[1])
         ):
             self._solver.update(tokens[0], [
                 True if c == 'o' else False if c == 'x' else None for c in tokens[1]])
@@ -189,12 +312,15 @@ You will be prompted until you either exit or there is only one word left.
       'o': letter is in the word in the right position.
    For example, if the right answer is "FAVOR" and your guess is "VAPOR",
    then the evaluation string would be "-OXOO".
+4. You may take back the last evaluation by entering, "undo".
 """)
 
-    def _prompt(self):
+    def _prompt(self) -> Optional[str]:
         print(self._solver.top(self._top_size))
-        print("> ", end="", flush=True)
-        return stdin.readline()
+        try:
+            return input("> ")
+        except EOFError:
+            return None
 
     def main(self):
         self._help()
@@ -202,5 +328,6 @@ You will be prompted until you either exit or there is only one word left.
         while self._handle_line(line):
             line = self._prompt()
 
-cli = WordleCli()
-cli.main()
\ No newline at end of file
+if __name__ == '__main__':
+    cli = WordleCli()
+    cli.main()
\ No newline at end of file